@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-import tomlkit
+import tomllib
 import sys
 import json
 import os
@@ -8,37 +8,90 @@ import subprocess
 import logging
 import re
 import argparse
-from semantic_version import Version
+import functools
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_branch_version(branch):
-    """Fetch version from a branch's Cargo.toml using Git."""
+_README_VERSION_RE = re.compile(r'gbf_core = "(.*?)"')
+_CARGO_VERSION_RE = re.compile(rb'^version\s*=\s*"[^"]*"', re.MULTILINE)
+_PKG_VER_RE = re.compile(rb'(?ms)^\[package\].*?^version\s*=\s*"([^"]+)"')
+
+# File contents (package.json dicts, README text) keyed by path, so the
+# update_* functions reuse what the get_* functions already read. Cargo.toml
+# reads go through mmap and are not cached; their update path rereads the file.
+_doc_cache = {}
+
+@functools.lru_cache(maxsize=None)
+def _fetch_branches_once(*branches):
+    """Fetch the given remote branches in a single git invocation.
+
+    Cached so repeated calls with the same branches only hit the network once.
+    Shallow + blobless so only the tip commits come down; the single
+    Cargo.toml blob we read is then fetched on demand.
+    """
+    subprocess.run(
+        ['git', 'fetch', '--depth=1', '--filter=blob:none', '--no-tags', 'origin', *branches],
+        check=True
+    )
+
+def _fetch_branch_cargo_versions(branches):
+    """Read gbf_core/Cargo.toml from several remote branches via one git process.
+
+    Streams all object requests through a single `git cat-file --batch`
+    instead of spawning `git show` once per branch.
+    """
+    versions = {}
     try:
-        version = subprocess.check_output(
-            f"git fetch origin {branch} && git show origin/{branch}:gbf_core/Cargo.toml",
-            shell=True,
-            text=True
-        )
-        cargo_content = tomlkit.loads(version)
-        version_str = cargo_content.get('package', {}).get('version')
-        if not version_str:
-            raise ValueError(f"Version not found in branch {branch}")
-        return Version(version_str)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to fetch version from branch {branch}: {e}")
+        with subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        ) as proc:
+            requests = ''.join(f'origin/{branch}:gbf_core/Cargo.toml\n' for branch in branches)
+            proc.stdin.write(requests.encode())
+            proc.stdin.close()
+            for branch in branches:
+                header = proc.stdout.readline().decode().split()
+                if len(header) != 3:
+                    raise ValueError(f"gbf_core/Cargo.toml not found on branch {branch}")
+                blob = proc.stdout.read(int(header[2]))
+                proc.stdout.read(1)  # trailing newline after each object
+                # A bytes scan for the [package] version line beats parsing
+                # the whole manifest; fall back to tomllib if it misses.
+                match = _PKG_VER_RE.search(blob)
+                if match:
+                    version_str = match.group(1).decode()
+                else:
+                    version_str = tomllib.loads(blob.decode()).get('package', {}).get('version')
+                if not version_str:
+                    raise ValueError(f"Version not found in branch {branch}")
+                versions[branch] = parse_ver(version_str)
+    except Exception as e:
+        logger.error(f"Failed to fetch branch versions: {e}")
         raise
+    return versions
+
+def get_branch_version(branch):
+    """Fetch version from a branch's Cargo.toml using Git."""
+    return _fetch_branch_cargo_versions([branch])[branch]
 
 def get_local_cargo_version(path):
     """Fetch version from a local Cargo.toml file."""
     try:
-        with open(path, 'r') as f:
-            cargo_content = tomlkit.load(f)
-            version_str = cargo_content.get('package', {}).get('version')
-            if not version_str:
-                raise ValueError(f"Version not found in {path}")
-            return Version(version_str)
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Scan the mapped bytes directly; no decode or TOML parse on
+                # the read-only path. Fall back to tomllib if the scan misses.
+                match = _PKG_VER_RE.search(mm)
+                if match:
+                    return parse_ver(match.group(1).decode())
+                version_str = tomllib.loads(mm[:].decode()).get('package', {}).get('version')
+        if not version_str:
+            raise ValueError(f"Version not found in {path}")
+        return parse_ver(version_str)
     except FileNotFoundError:
         logger.error(f"File {path} not found")
         raise
@@ -48,10 +101,11 @@ def get_local_package_version(path):
     try:
         with open(path, 'r') as f:
             package_content = json.load(f)
-            version_str = package_content.get('version')
-            if not version_str:
-                raise ValueError(f"Version not found in {path}")
-            return Version(version_str)
+        _doc_cache[path] = package_content
+        version_str = package_content.get('version')
+        if not version_str:
+            raise ValueError(f"Version not found in {path}")
+        return parse_ver(version_str)
     except FileNotFoundError:
         logger.error(f"File {path} not found")
         raise
@@ -59,27 +113,47 @@ def get_local_package_version(path):
         logger.error(f"Failed to parse JSON in {path}: {e}")
         raise
 
+def cargo_matches(path, expected):
+    """Check whether a Cargo.toml's [package] version equals the expected bytes.
+
+    A containment-style scan for validation only; no TOML parse or version
+    object is needed just to assert equality.
+    """
+    try:
+        with open(path, 'rb') as f:
+            match = _PKG_VER_RE.search(f.read())
+        return match is not None and match.group(1) == expected
+    except FileNotFoundError:
+        logger.error(f"File {path} not found")
+        raise
+
 def get_readme_version():
     """Fetch version from the README file."""
     try:
         with open('README.md', 'r') as f:
             content = f.read()
-            version_match = re.search(r'gbf_core = "(.*?)"', content)
-            if not version_match:
-                raise ValueError("Version not found in README.md")
-            return Version(version_match.group(1))
+        _doc_cache['README.md'] = content
+        version_match = _README_VERSION_RE.search(content)
+        if not version_match:
+            raise ValueError("Version not found in README.md")
+        return parse_ver(version_match.group(1))
     except FileNotFoundError:
         logger.error("README.md not found")
         raise
 
-def parse_version(version_str):
-    """Parse a version string into a Version object."""
+def parse_ver(version_str):
+    """Parse 'major.minor.patch' into a comparable (int, int, int) tuple."""
     try:
-        return Version(version_str)
-    except ValueError as e:
+        major, minor, patch = version_str.split('.')[:3]
+        return (int(major), int(minor), int(patch.split('-')[0]))
+    except ValueError:
         logger.error(f"Invalid version string: {version_str}")
         raise
 
+def fmt_ver(version):
+    """Format a version tuple back into 'major.minor.patch'."""
+    return f'{version[0]}.{version[1]}.{version[2]}'
+
 def check_dev_merge_version(current_version, dev_version):
     """
     Check version rules for merging into dev branch.
@@ -88,52 +162,72 @@ def check_dev_merge_version(current_version, dev_version):
       - The feature branch version has the same major and minor as the dev branch.
       - The feature branch version is not less than the dev branch version.
     """
-    if (current_version.major, current_version.minor) != (dev_version.major, dev_version.minor):
+    if current_version[:2] != dev_version[:2]:
         raise ValueError("When merging into dev, only the patch version can change.")
     if current_version < dev_version:
         raise ValueError("Feature branch version must be greater than or equal to dev branch version.")
 
-def check_version_match(current_version, target_version, description):
-    """Validate that two versions match."""
-    if current_version != target_version:
-        raise ValueError(f"Version mismatch: {description}. Expected {target_version}, found {current_version}.")
-
 def bump_version(version, bump_type):
     """Bump major, minor, or patch version."""
+    major, minor, patch = version
     if bump_type == 'major':
-        return Version(major=version.major + 1, minor=0, patch=0)
+        return (major + 1, 0, 0)
     elif bump_type == 'minor':
-        return Version(major=version.major, minor=version.minor + 1, patch=0)
+        return (major, minor + 1, 0)
     elif bump_type == 'patch':
-        return Version(major=version.major, minor=version.minor, patch=version.patch + 1)
+        return (major, minor, patch + 1)
     else:
         raise ValueError("Invalid bump type. Use 'major', 'minor', or 'patch'.")
 
-def update_cargo_version(file_path, new_version):
-    """Update version in a Cargo.toml file."""
-    try:
-        with open(file_path, 'r+') as f:
-            cargo_content = tomlkit.load(f)
-            if 'package' not in cargo_content:
-                cargo_content['package'] = {}
-            cargo_content['package']['version'] = str(new_version)
-            f.seek(0)
-            f.write(tomlkit.dumps(cargo_content))
-            f.truncate()
-        logger.info(f"Updated version in {file_path} to {new_version}")
-    except Exception as e:
-        logger.error(f"Failed to update version in {file_path}: {e}")
-        raise
+def _replace_cargo_version(content, new_version):
+    """Rewrite the [package] version line in Cargo.toml bytes, preserving formatting."""
+    start = content.index(b'[package]')
+    new_tail, count = _CARGO_VERSION_RE.subn(
+        f'version = "{new_version}"'.encode(), content[start:], count=1
+    )
+    if not count:
+        raise ValueError("Version line not found under [package]")
+    return content[:start] + new_tail
+
+def update_cargo_versions(paths, new_version):
+    """Update the version in several Cargo.toml files in one tight loop.
+
+    Each file is rewritten via a temp file and os.replace so a crash
+    mid-bump never leaves a half-written manifest behind.
+    """
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            new_content = _replace_cargo_version(content, new_version)
+            if new_content == content:
+                logger.info(f"{path} already at {new_version}, skipping write")
+                continue
+            tmp_path = path + '.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, new_content)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path)
+            logger.info(f"Updated version in {path} to {new_version}")
+        except Exception as e:
+            logger.error(f"Failed to update version in {path}: {e}")
+            raise
 
 def update_package_version(file_path, new_version):
     """Update version in a package.json file."""
     try:
-        with open(file_path, 'r+') as f:
-            package_content = json.load(f)
-            package_content['version'] = str(new_version)
-            f.seek(0)
+        package_content = _doc_cache.get(file_path)
+        if package_content is None:
+            with open(file_path, 'r') as f:
+                package_content = json.load(f)
+        if package_content.get('version') == new_version:
+            logger.info(f"{file_path} already at {new_version}, skipping write")
+            return
+        package_content['version'] = new_version
+        with open(file_path, 'w') as f:
             f.write(json.dumps(package_content, indent=2))
-            f.truncate()
         logger.info(f"Updated version in {file_path} to {new_version}")
     except Exception as e:
         logger.error(f"Failed to update version in {file_path}: {e}")
@@ -142,16 +236,19 @@ def update_package_version(file_path, new_version):
 def update_readme_version(new_version):
     """Update version in the README file."""
     try:
-        with open('README.md', 'r+') as f:
-            content = f.read()
-            new_content = re.sub(
-                r'gbf_core = ".*?"',
-                f'gbf_core = "{new_version}"',
-                content
-            )
-            f.seek(0)
+        content = _doc_cache.get('README.md')
+        if content is None:
+            with open('README.md', 'r') as f:
+                content = f.read()
+        new_content = _README_VERSION_RE.sub(
+            f'gbf_core = "{new_version}"',
+            content
+        )
+        if new_content == content:
+            logger.info(f"README.md already at {new_version}, skipping write")
+            return
+        with open('README.md', 'w') as f:
             f.write(new_content)
-            f.truncate()
         logger.info(f"Updated README version to {new_version}")
     except Exception as e:
         logger.error(f"Failed to update README version: {e}")
@@ -169,57 +266,82 @@ def main():
     try:
         args = parse_args()
         
+        # Determine target branch. In CI the GitHub env vars are always set,
+        # so only fall back to spawning git when running locally.
+        target_branch = os.environ.get('GITHUB_BASE_REF') or os.environ.get('GITHUB_REF_NAME')
+        if not target_branch:
+            target_branch = subprocess.check_output(
+                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True
+            ).strip()
+        logger.info(f"Target branch detected: {target_branch}")
+
         # Fetch versions
         logger.info("Fetching versions...")
-        # Only the dev branch exists now.
-        dev_version = get_branch_version('dev')
-        current_version = get_local_cargo_version('./gbf_core/Cargo.toml')
-        macros_version = get_local_cargo_version('./gbf_macros/Cargo.toml')
-        suite_version = get_local_cargo_version('./gbf_suite/Cargo.toml')
-        web_version = get_local_package_version('./gbf_web/package.json')
-        readme_version = get_readme_version()
-        
-        logger.info(f"Dev branch version: {dev_version}")
-        logger.info(f"Current branch version: {current_version}")
-        logger.info(f"gbf_macros version: {macros_version}")
-        logger.info(f"gbf_suite version: {suite_version}")
-        logger.info(f"gbf_web version: {web_version}")
-        logger.info(f"README version: {readme_version}")
-        
-        # Determine target branch.
-        target_branch = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD']).decode().strip()
-        if 'GITHUB_BASE_REF' in os.environ:
-            target_branch = os.getenv('GITHUB_BASE_REF', target_branch)
-        logger.info(f"Target branch detected: {target_branch}")
+        # Only the dev branch exists now, and its version is only consulted
+        # when the target branch is dev -- skip the network fetch otherwise.
+        dev_version = None
+        if target_branch == 'dev':
+            _fetch_branches_once('dev')
+            dev_version = get_branch_version('dev')
+        # The local reads are independent; overlap their I/O. The sibling
+        # Cargo.toml files only need an equality check against the current
+        # version, not a full parse.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            current_future = pool.submit(get_local_cargo_version, './gbf_core/Cargo.toml')
+            web_future = pool.submit(get_local_package_version, './gbf_web/package.json')
+            readme_future = pool.submit(get_readme_version)
+            current_version = current_future.result()
+            expected = fmt_ver(current_version).encode()
+            macros_future = pool.submit(cargo_matches, './gbf_macros/Cargo.toml', expected)
+            suite_future = pool.submit(cargo_matches, './gbf_suite/Cargo.toml', expected)
+            web_version = web_future.result()
+            readme_version = readme_future.result()
+            macros_ok = macros_future.result()
+            suite_ok = suite_future.result()
+
+        if dev_version is not None:
+            logger.info(f"Dev branch version: {fmt_ver(dev_version)}")
+        logger.info(f"Current branch version: {fmt_ver(current_version)}")
+        logger.info(f"gbf_web version: {fmt_ver(web_version)}")
+        logger.info(f"README version: {fmt_ver(readme_version)}")
 
         # Validate versions
-        logger.info("Checking README version...")
-        check_version_match(current_version, readme_version, "README.md version mismatch")
-        logger.info("Checking gbf_macros version...")
-        check_version_match(current_version, macros_version, "gbf_macros/Cargo.toml version mismatch")
-        logger.info("Checking gbf_suite version...")
-        check_version_match(current_version, suite_version, "gbf_suite/Cargo.toml version mismatch")
-        logger.info("Checking gbf_web version...")
-        check_version_match(current_version, web_version, "gbf_web/package.json version mismatch")
+        logger.info("Checking sibling versions...")
+        mismatches = [
+            name
+            for name, ok in (
+                ('README.md', readme_version == current_version),
+                ('gbf_macros/Cargo.toml', macros_ok),
+                ('gbf_suite/Cargo.toml', suite_ok),
+                ('gbf_web/package.json', web_version == current_version),
+            )
+            if not ok
+        ]
+        if mismatches:
+            raise ValueError(
+                f"Version mismatch: expected {fmt_ver(current_version)} in {', '.join(mismatches)}."
+            )
 
         if args.bump:
             # For the dev branch, if the feature branch already has a version greater than dev,
             # then no bump is needed. (If it's equal, we bump to increment the patch.)
             if target_branch == 'dev' and current_version > dev_version:
                 logger.info(
-                    f"Current version ({current_version}) is already greater than dev branch version ({dev_version}). Skipping bump."
+                    f"Current version ({fmt_ver(current_version)}) is already greater than dev branch version ({fmt_ver(dev_version)}). Skipping bump."
                 )
                 sys.exit(0)
             logger.info(f"Bumping version: {args.bump}")
-            new_version = bump_version(current_version, args.bump)
-            
+            new_version = fmt_ver(bump_version(current_version, args.bump))
+
             # Update versions in all relevant files.
-            update_cargo_version('./gbf_core/Cargo.toml', new_version)
-            update_cargo_version('./gbf_macros/Cargo.toml', new_version)
-            update_cargo_version('./gbf_suite/Cargo.toml', new_version)
+            update_cargo_versions([
+                './gbf_core/Cargo.toml',
+                './gbf_macros/Cargo.toml',
+                './gbf_suite/Cargo.toml',
+            ], new_version)
             update_package_version('./gbf_web/package.json', new_version)
             update_readme_version(new_version)
-            
+
             logger.info(f"Successfully bumped version to {new_version}")
             return
         